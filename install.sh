@@ -112,7 +112,7 @@ echo "======================================"
 # Install as root, then fix ownership
 venv/bin/pip install --upgrade pip
 venv/bin/pip install -r requirements.txt
-echo "  ✓ Installed: bambulabs_api, prometheus-client, PyYAML, Flask, Pillow"
+echo "  ✓ Installed: bambulabs_api, prometheus-client, PyYAML, Quart, Uvicorn"
 chown -R "$SERVICE_USER:$SERVICE_USER" venv
 
 echo ""
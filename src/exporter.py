@@ -4,23 +4,70 @@ Bambulab Prometheus Exporter
 A lightweight Prometheus exporter for Bambu Lab 3D printers.
 """
 
+import asyncio
+import copy
+import os
+import re
 import time
 import logging
 import signal
 import sys
-from typing import Dict, List, Optional
-from io import BytesIO
-from threading import Thread
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from threading import Event, Lock, Thread
 import yaml
-from prometheus_client import start_http_server, Gauge, Counter, Enum, Info
-from flask import Flask, send_file, Response
+from prometheus_client import start_http_server, Gauge, Counter, Enum, Info, REGISTRY
+from prometheus_client.registry import Collector, CollectorRegistry
+from quart import Quart, Response
+import uvicorn
 import bambulabs_api as bl
 
+# Prefer the libyaml C loader; PyYAML falls back to pure Python when it's not compiled in
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Parsed config files keyed by path, validated against (mtime_ns, size) on each load
+_YAML_CACHE: 'OrderedDict[str, Tuple[int, int, dict]]' = OrderedDict()
+_YAML_CACHE_MAX = 32
+
+# Static camera page, encoded once instead of on every request
+_CAMERA_HTML_BYTES = b'''
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Printer Camera</title>
+    <style>
+        body { margin: 0; padding: 0; background: #000; display: flex; justify-content: center; align-items: center; height: 100vh; }
+        img { max-width: 100%; max-height: 100vh; object-fit: contain; }
+    </style>
+</head>
+<body>
+    <img id="camera" src="/camera">
+    <script>
+        setInterval(function() {
+            document.getElementById('camera').src = '/camera?' + Date.now();
+        }, 2000);
+    </script>
+</body>
+</html>
+'''
+# Built once; Quart responses are mutable, so a fresh Response is created per request
+_CAMERA_HTML_HEADERS = {
+    'Content-Length': str(len(_CAMERA_HTML_BYTES)),
+    # The page polls /camera itself; don't let the browser serve a cached copy of the page
+    'Cache-Control': 'no-store'
+}
+
 
 class BambuMetrics:
     """Prometheus metrics for Bambu Lab printers."""
     
-    def __init__(self, printer_name: str):
+    def __init__(self, printer_name: str, registry: CollectorRegistry = REGISTRY):
         """Initialize metrics with printer-specific labels."""
         labels = ['printer']
         
@@ -28,129 +75,303 @@ class BambuMetrics:
         self.nozzle_temp = Gauge(
             'bambu_nozzle_temperature_celsius',
             'Current nozzle temperature',
-            labels
+            labels,
+            registry=registry
         )
         self.nozzle_target_temp = Gauge(
             'bambu_nozzle_target_temperature_celsius',
             'Target nozzle temperature',
-            labels
+            labels,
+            registry=registry
         )
         self.bed_temp = Gauge(
             'bambu_bed_temperature_celsius',
             'Current bed temperature',
-            labels
+            labels,
+            registry=registry
         )
         self.bed_target_temp = Gauge(
             'bambu_bed_target_temperature_celsius',
             'Target bed temperature',
-            labels
+            labels,
+            registry=registry
         )
         self.chamber_temp = Gauge(
             'bambu_chamber_temperature_celsius',
             'Chamber temperature',
-            labels
+            labels,
+            registry=registry
         )
         
         # Print progress metrics
         self.print_progress = Gauge(
             'bambu_print_progress_percent',
             'Print completion percentage',
-            labels
+            labels,
+            registry=registry
         )
         self.print_remaining_time = Gauge(
             'bambu_print_remaining_time_seconds',
             'Estimated time remaining for print',
-            labels
+            labels,
+            registry=registry
         )
         self.current_layer = Gauge(
             'bambu_current_layer',
             'Current layer number',
-            labels
+            labels,
+            registry=registry
         )
         self.total_layers = Gauge(
             'bambu_total_layers',
             'Total layers in print',
-            labels
+            labels,
+            registry=registry
         )
         
         # Speed metrics
         self.print_speed = Gauge(
             'bambu_print_speed_percent',
             'Current print speed modifier',
-            labels
+            labels,
+            registry=registry
         )
         
         # State metrics
         self.printer_online = Gauge(
             'bambu_online',
             'Printer connectivity status',
-            labels
+            labels,
+            registry=registry
         )
         self.printer_state = Gauge(
             'bambu_printer_state',
             'Detailed printer state (0=IDLE, 1=PRINTING, 2=PAUSED, 3=FINISH, 4=FAILED)',
-            labels
+            labels,
+            registry=registry
         )
         self.wifi_signal = Gauge(
             'bambu_wifi_signal_strength_dbm',
             'WiFi signal strength',
-            labels
+            labels,
+            registry=registry
         )
         self.chamber_light = Gauge(
             'bambu_chamber_light',
             'Chamber light state (0=off, 1=on)',
-            labels
+            labels,
+            registry=registry
         )
         self.error_code = Gauge(
             'bambu_error_code',
             'Current error code (0=no error)',
-            labels
+            labels,
+            registry=registry
         )
         
         # Statistics
         self.total_prints = Counter(
             'bambu_total_prints',
             'Lifetime print count',
-            labels
+            labels,
+            registry=registry
         )
         
         # Info metrics (stored as labels in gauges for easy querying)
         self.current_file = Gauge(
             'bambu_current_file_info',
             'Current file being printed (1=active, value in label)',
-            labels + ['filename']
+            labels + ['filename'],
+            registry=registry
         )
         self.nozzle_info = Gauge(
             'bambu_nozzle_info',
             'Nozzle information (1=active, details in labels)',
-            labels + ['nozzle_type', 'nozzle_diameter_mm']
+            labels + ['nozzle_type', 'nozzle_diameter_mm'],
+            registry=registry
         )
         self.printer_info = Info(
             'bambu_printer',
             'Printer information',
-            labels
+            labels,
+            registry=registry
         )
         
         self.printer_name = printer_name
 
 
+def _as_str(value) -> str:
+    """Return value as a str, skipping the str() call when it already is one."""
+    # Exact type check: str subclasses (e.g. str-based enums) may stringify differently
+    return value if type(value) is str else str(value)
+
+
+_DBM_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def _parse_dbm(value) -> float:
+    """Convert a WiFi signal string like "-63dBm" to a number."""
+    match = _DBM_RE.search(_as_str(value))
+    if match is None:
+        raise ValueError(f"unrecognized WiFi signal: {value!r}")
+    return float(match.group())
+
+
+def _light_value(value) -> int:
+    """API returns string 'on' or 'off', not boolean."""
+    return 1 if _as_str(value).lower() == 'on' else 0
+
+
+def _error_code_value(value) -> float:
+    """Normalize the printer error code (falsy means no error)."""
+    if not value:
+        return 0
+    # Already numeric in the common case; only strings need converting
+    return value if isinstance(value, (int, float)) else int(value)
+
+
+# (bound metric, printer getter, transform) tables, resolved per printer by BambuExporter._bind_fields
+# Temperatures double as the "printer is sending data" signal
+_TEMPERATURE_FIELDS = (
+    ('nozzle_temp', 'get_nozzle_temperature', None),
+    ('bed_temp', 'get_bed_temperature', None),
+    ('chamber_temp', 'get_chamber_temperature', None),
+)
+_STATUS_FIELDS = (
+    ('print_progress', 'get_percentage', None),
+    ('print_remaining_time', 'get_time', lambda minutes: minutes * 60),  # API reports minutes
+    ('current_layer', 'current_layer_num', None),
+    ('total_layers', 'total_layer_num', None),
+    ('wifi_signal', 'wifi_signal', _parse_dbm),
+    ('chamber_light', 'get_light_state', _light_value),
+    ('error_code', 'print_error_code', _error_code_value),
+)
+
+# Longest to wait for a printer's MQTT session after connect() (seconds)
+_CONNECT_WAIT = 2
+
+# Printer state name -> bambu_printer_state value
+_STATE_MAP = {
+    'IDLE': 0,
+    'PRINTING': 1,
+    'RUNNING': 1,  # RUNNING is the same as PRINTING
+    'PAUSED': 2,
+    'FINISH': 3,
+    'FAILED': 4
+}
+
+# Gauges zeroed whenever a printer goes offline
+_OFFLINE_CLEAR = (
+    'nozzle_temp',
+    'nozzle_target_temp',
+    'bed_temp',
+    'bed_target_temp',
+    'chamber_temp',
+    'print_progress',
+    'print_remaining_time',
+    'current_layer',
+    'total_layers',
+    'print_speed',
+    'error_code',
+    'printer_state',
+)
+
+
+@dataclass
+class BoundMetrics:
+    """Per-printer metric children, resolved once so updates skip labels() lookups."""
+    
+    nozzle_temp: Gauge
+    nozzle_target_temp: Gauge
+    bed_temp: Gauge
+    bed_target_temp: Gauge
+    chamber_temp: Gauge
+    print_progress: Gauge
+    print_remaining_time: Gauge
+    current_layer: Gauge
+    total_layers: Gauge
+    print_speed: Gauge
+    printer_online: Gauge
+    printer_state: Gauge
+    wifi_signal: Gauge
+    chamber_light: Gauge
+    error_code: Gauge
+    
+    @classmethod
+    def bind(cls, metrics: BambuMetrics, printer_name: str) -> 'BoundMetrics':
+        """Resolve every single-label gauge in metrics for printer_name."""
+        return cls(**{
+            name: getattr(metrics, name).labels(printer=printer_name)
+            for name in cls.__dataclass_fields__
+        })
+    
+    def mark_offline(self):
+        """Mark printer offline and zero its values to avoid stale data in Grafana."""
+        self.printer_online.set(0)
+        for attr in _OFFLINE_CLEAR:
+            getattr(self, attr).set(0)
+
+
+class BambuCollector(Collector):
+    """Refreshes printer metrics when Prometheus scrapes, so served values are never older than update_interval."""
+    
+    def __init__(self, exporter: 'BambuExporter'):
+        self.exporter = exporter
+    
+    def collect(self):
+        """Refresh stale metrics; the gauges themselves are rendered by the registry."""
+        try:
+            self.exporter.refresh_metrics()
+        except Exception as e:
+            self.exporter.logger.error("Error refreshing metrics on scrape: %s", e)
+        return []
+
+
 class BambuExporter:
     """Main exporter class for Bambu Lab printers."""
     
-    def __init__(self, config_path: str = 'config.yaml'):
+    def __init__(self, config_path: str = 'config.yaml', registry: CollectorRegistry = REGISTRY):
         """Initialize the exporter with configuration."""
         self.config = self._load_config(config_path)
         self.logger = self._setup_logging()
+        self.registry = registry
         self.printers: Dict[str, bl.Printer] = {}
         self.metrics: Dict[str, BambuMetrics] = {}
+        self.bound: Dict[str, BoundMetrics] = {}
+        # Per printer: (temperature fields, status fields) as bound getters
+        self._getters: Dict[str, Tuple[List[tuple], List[tuple]]] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        # Label values last set on the info gauges, per printer, so stale series can be removed
+        self._last_file_labels: Dict[str, Tuple[str, ...]] = {}
+        self._last_nozzle_labels: Dict[str, Tuple[str, ...]] = {}
+        self.update_interval = self.config.get('exporter', {}).get('update_interval', 5)
+        self._update_lock = Lock()
+        self._last_update = float('-inf')
         self.running = False
-        self.flask_app = Flask(__name__)
-        self._setup_flask_routes()
+        self._shutdown = Event()
+        self.camera_app = Quart(__name__)
+        self._setup_camera_routes()
         
     def _load_config(self, config_path: str) -> dict:
-        """Load configuration from YAML file."""
-        with open(config_path, 'r') as f:
-            return yaml.safe_load(f)
+        """Load configuration from YAML file, reusing the last parse if the file is unchanged."""
+        path = os.path.abspath(config_path)
+        st = os.stat(path)
+        
+        cached = _YAML_CACHE.get(path)
+        if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+            _YAML_CACHE.move_to_end(path)
+            # Hand out a copy so callers can't mutate the cached config
+            return copy.deepcopy(cached[2])
+        
+        with open(path, 'r') as f:
+            config = yaml.load(f, Loader=_YamlLoader)
+        
+        _YAML_CACHE[path] = (st.st_mtime_ns, st.st_size, config)
+        _YAML_CACHE.move_to_end(path)
+        if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+            _YAML_CACHE.popitem(last=False)
+        
+        return copy.deepcopy(config)
     
     def _setup_logging(self) -> logging.Logger:
         """Setup logging configuration."""
@@ -161,11 +382,11 @@ class BambuExporter:
         )
         return logging.getLogger(__name__)
     
-    def _setup_flask_routes(self):
-        """Setup Flask routes for camera feed."""
+    def _setup_camera_routes(self):
+        """Setup Quart routes for camera feed."""
         
-        @self.flask_app.route('/camera')
-        def camera_feed():
+        @self.camera_app.route('/camera')
+        async def camera_feed():
             """Serve camera image from the first available printer."""
             try:
                 # Get first available printer
@@ -174,83 +395,99 @@ class BambuExporter:
                 
                 printer = next(iter(self.printers.values()))
                 
-                # Get camera image
-                img = printer.get_camera_image()
-                if img is None:
+                # The camera thread keeps the latest JPEG as raw bytes; read it directly
+                # rather than through get_camera_frame(), which base64-encodes a copy
+                # that we'd only decode again
+                frame = printer.camera_client.last_frame
+                if not frame:
                     return Response("Camera image not available", status=404)
                 
-                # Convert PIL image to JPEG bytes
-                img_io = BytesIO()
-                img.save(img_io, 'JPEG', quality=85)
-                img_io.seek(0)
-                
-                return send_file(img_io, mimetype='image/jpeg')
+                return Response(bytes(frame), mimetype='image/jpeg')
                 
             except Exception as e:
                 self.logger.error(f"Error serving camera image: {e}")
                 return Response(f"Error: {str(e)}", status=500)
         
-        @self.flask_app.route('/camera.html')
-        def camera_html():
+        @self.camera_app.route('/camera.html')
+        async def camera_html():
             """Serve HTML page with auto-refreshing camera."""
-            html = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="UTF-8">
-    <title>Printer Camera</title>
-    <style>
-        body { margin: 0; padding: 0; background: #000; display: flex; justify-content: center; align-items: center; height: 100vh; }
-        img { max-width: 100%; max-height: 100vh; object-fit: contain; }
-    </style>
-</head>
-<body>
-    <img id="camera" src="/camera">
-    <script>
-        setInterval(function() {
-            document.getElementById('camera').src = '/camera?' + Date.now();
-        }, 2000);
-    </script>
-</body>
-</html>
-            '''
-            return Response(html, mimetype='text/html')
+            return Response(
+                _CAMERA_HTML_BYTES,
+                mimetype='text/html',
+                headers=_CAMERA_HTML_HEADERS
+            )
         
-        @self.flask_app.route('/health')
-        def health():
+        @self.camera_app.route('/health')
+        async def health():
             """Health check endpoint."""
             return {'status': 'ok', 'printers': len(self.printers)}
     
+    def _serve_camera(self, host: str, port: int):
+        """Run the camera app under Uvicorn on this thread's own event loop."""
+        config = uvicorn.Config(
+            self.camera_app,
+            host=host,
+            port=port,
+            loop='asyncio',
+            access_log=False,
+            log_level='warning'
+        )
+        server = uvicorn.Server(config)
+        asyncio.run(server.serve())
+    
+    def _connect_printer(self, printer_config: dict) -> bl.Printer:
+        """Connect a single printer and wait briefly for its MQTT session."""
+        printer = bl.Printer(printer_config['ip'], printer_config['access_code'], printer_config['serial'])
+        printer.connect()
+        
+        # Wait for the connection to establish, returning as soon as MQTT is up
+        deadline = time.monotonic() + _CONNECT_WAIT
+        while not printer.mqtt_client_connected() and time.monotonic() < deadline:
+            if self._shutdown.wait(0.05):
+                break
+        
+        return printer
+    
     def connect_printers(self):
-        """Connect to all enabled printers."""
-        for printer_config in self.config.get('printers', []):
-            if not printer_config.get('enabled', True):
-                continue
-                
-            name = printer_config['name']
-            ip = printer_config['ip']
-            access_code = printer_config['access_code']
-            serial = printer_config['serial']
-            
-            self.logger.info(f"Connecting to printer '{name}' at {ip}")
+        """Connect to all enabled printers in parallel."""
+        printer_configs = [
+            printer_config for printer_config in self.config.get('printers', [])
+            if printer_config.get('enabled', True)
+        ]
+        if not printer_configs:
+            return
+        
+        for printer_config in printer_configs:
+            self.logger.info(f"Connecting to printer '{printer_config['name']}' at {printer_config['ip']}")
+        
+        # Connections are slow to establish, so start them all at once instead of one after another
+        with ThreadPoolExecutor(max_workers=len(printer_configs), thread_name_prefix='bambu-connect') as pool:
+            futures = [
+                (printer_config, pool.submit(self._connect_printer, printer_config))
+                for printer_config in printer_configs
+            ]
             
-            try:
-                printer = bl.Printer(ip, access_code, serial)
-                printer.connect()
-                
-                # Wait a moment for connection to establish
-                time.sleep(2)
-                
-                self.printers[name] = printer
-                self.metrics[name] = BambuMetrics(name)
-                
-                # Set initial online status
-                self.metrics[name].printer_online.labels(printer=name).set(1)
-                
-                self.logger.info(f"Successfully connected to printer '{name}'")
-                
-            except Exception as e:
-                self.logger.error(f"Failed to connect to printer '{name}': {e}")
+            # Metrics are registered here, in config order, rather than from the worker threads
+            for printer_config, future in futures:
+                name = printer_config['name']
+                try:
+                    printer = future.result()
+                    
+                    self.printers[name] = printer
+                    self.metrics[name] = BambuMetrics(name, self.registry)
+                    self.bound[name] = BoundMetrics.bind(self.metrics[name], name)
+                    self._getters[name] = (
+                        self._bind_fields(name, printer, self.bound[name], _TEMPERATURE_FIELDS),
+                        self._bind_fields(name, printer, self.bound[name], _STATUS_FIELDS)
+                    )
+                    
+                    # Set initial online status
+                    self.bound[name].printer_online.set(1)
+                    
+                    self.logger.info(f"Successfully connected to printer '{name}'")
+                    
+                except Exception as e:
+                    self.logger.error(f"Failed to connect to printer '{name}': {e}")
     
     def disconnect_printers(self):
         """Disconnect from all printers."""
@@ -261,224 +498,175 @@ class BambuExporter:
             except Exception as e:
                 self.logger.error(f"Error disconnecting from printer '{name}': {e}")
     
-    def update_metrics(self):
-        """Update metrics for all connected printers."""
+    def refresh_metrics(self):
+        """Update metrics unless they were updated within the last update_interval."""
+        if not self.printers:
+            return
+        
+        # Concurrent scrapes wait for one update instead of each polling the printers
+        with self._update_lock:
+            if time.monotonic() - self._last_update < self.update_interval:
+                return
+            self.update_metrics()
+            self._last_update = time.monotonic()
+    
+    def check_connections(self):
+        """Heartbeat between scrapes: mark printers that dropped off MQTT as offline."""
         for name, printer in self.printers.items():
+            if not printer.mqtt_client_connected():
+                self.logger.warning("Printer '%s' not connected to MQTT", name)
+                self.bound[name].mark_offline()
+    
+    def update_metrics(self):
+        """Update metrics for all connected printers in parallel."""
+        if not self.printers:
+            return
+        
+        # Printers are polled concurrently so a cycle takes one round-trip, not one per printer
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=len(self.printers),
+                thread_name_prefix='bambu-update'
+            )
+        
+        list(self._pool.map(self._update_printer, self.printers.keys(), self.printers.values()))
+    
+    def _bind_fields(self, name: str, printer: bl.Printer, bm: BoundMetrics, fields) -> List[tuple]:
+        """Resolve a field table to (attr, metric child, bound getter, transform) for one printer."""
+        bound = []
+        for attr, method, xform in fields:
+            getter = getattr(printer, method, None)
+            if getter is None:
+                self.logger.warning(f"Printer '{name}' API has no {method}(), skipping {attr}")
+                continue
+            bound.append((attr, getattr(bm, attr), getter, xform))
+        return bound
+    
+    def _apply_fields(self, name: str, fields: List[tuple]) -> bool:
+        """Read each bound field and set its metric; return True if any value was set."""
+        received = False
+        for attr, child, getter, xform in fields:
             try:
-                metrics = self.metrics[name]
-                
-                # Check if printer is connected
-                if not printer.mqtt_client_connected():
-                    self.logger.warning(f"Printer '{name}' not connected to MQTT")
-                    metrics.printer_online.labels(printer=name).set(0)
-                    
-                    # Clear all metrics when printer is offline
-                    metrics.nozzle_temp.labels(printer=name).set(0)
-                    metrics.nozzle_target_temp.labels(printer=name).set(0)
-                    metrics.bed_temp.labels(printer=name).set(0)
-                    metrics.bed_target_temp.labels(printer=name).set(0)
-                    metrics.chamber_temp.labels(printer=name).set(0)
-                    metrics.print_progress.labels(printer=name).set(0)
-                    metrics.print_remaining_time.labels(printer=name).set(0)
-                    metrics.current_layer.labels(printer=name).set(0)
-                    metrics.total_layers.labels(printer=name).set(0)
-                    metrics.print_speed.labels(printer=name).set(0)
-                    metrics.error_code.labels(printer=name).set(0)
-                    metrics.printer_state.labels(printer=name).set(0)
+                value = getter()
+                if value is None:
                     continue
+                child.set(xform(value) if xform else value)
+                received = True
+            except Exception as e:
+                self.logger.debug("Error getting %s for '%s': %s", attr, name, e)
+        return received
+    
+    def _set_info(self, gauge: Gauge, last_labels: Dict[str, Tuple[str, ...]], name: str, *values: str):
+        """Set an info gauge to 1 for values, removing only this printer's previous series."""
+        labelvalues = (name,) + values
+        previous = last_labels.get(name)
+        if previous == labelvalues:
+            return
+        if previous is not None:
+            gauge.remove(*previous)
+        gauge.labels(*labelvalues).set(1)
+        last_labels[name] = labelvalues
+    
+    def _update_printer(self, name: str, printer: bl.Printer):
+        """Update metrics for a single printer."""
+        try:
+            metrics = self.metrics[name]
+            bm = self.bound[name]
+            temperature_fields, status_fields = self._getters[name]
+            
+            # Check if printer is connected
+            if not printer.mqtt_client_connected():
+                self.logger.warning("Printer '%s' not connected to MQTT", name)
+                bm.mark_offline()
+                return
+            
+            # Temperature metrics also tell us if we're actually receiving data
+            # (printer might be off but MQTT still connected)
+            # Note: API doesn't provide target temps via getter, only current
+            data_received = self._apply_fields(name, temperature_fields)
+            
+            # Set online status based on whether we received any data
+            if not data_received:
+                self.logger.warning("Printer '%s' connected but not sending data (might be powered off)", name)
+                bm.mark_offline()
+                self.logger.debug("Cleared metrics for offline printer '%s'", name)
+                return
+            
+            # Printer is online and sending data
+            bm.printer_online.set(1)
+            
+            # Print progress, WiFi signal, chamber light and error code
+            self._apply_fields(name, status_fields)
+            
+            # Speed metrics
+            try:
+                print_speed = printer.get_print_speed()
+                if print_speed is not None:
+                    bm.print_speed.set(print_speed)
+                    self.logger.info("Printer '%s' speed: %s%%", name, print_speed)
+                else:
+                    self.logger.warning("Printer '%s' speed is None", name)
+            except Exception as e:
+                self.logger.warning("Error getting print speed for '%s': %s", name, e)
+            
+            # Detailed printer state
+            try:
+                # Use get_state() instead of get_current_state() - get_current_state() returns stale data
+                state = printer.get_state()
                 
-                # Check if we're actually receiving data (printer might be off but MQTT still connected)
-                data_received = False
-                
-                # Temperature metrics - use individual getter methods
-                try:
-                    nozzle_temp = printer.get_nozzle_temperature()
-                    if nozzle_temp is not None:
-                        metrics.nozzle_temp.labels(printer=name).set(nozzle_temp)
-                        data_received = True
-                        # Note: API doesn't provide target temps via getter, only current
-                except Exception as e:
-                    self.logger.debug(f"Error getting nozzle temp for '{name}': {e}")
-                
-                try:
-                    bed_temp = printer.get_bed_temperature()
-                    if bed_temp is not None:
-                        metrics.bed_temp.labels(printer=name).set(bed_temp)
-                        data_received = True
-                except Exception as e:
-                    self.logger.debug(f"Error getting bed temp for '{name}': {e}")
-                
-                try:
-                    chamber_temp = printer.get_chamber_temperature()
-                    if chamber_temp is not None:
-                        metrics.chamber_temp.labels(printer=name).set(chamber_temp)
-                        data_received = True
-                except Exception as e:
-                    self.logger.debug(f"Error getting chamber temp for '{name}': {e}")
-                
-                # Set online status based on whether we received any data
-                if not data_received:
-                    self.logger.warning(f"Printer '{name}' connected but not sending data (might be powered off)")
-                    metrics.printer_online.labels(printer=name).set(0)
-                    
-                    # Clear all metrics when printer is offline to avoid stale data in Grafana
-                    metrics.nozzle_temp.labels(printer=name).set(0)
-                    metrics.nozzle_target_temp.labels(printer=name).set(0)
-                    metrics.bed_temp.labels(printer=name).set(0)
-                    metrics.bed_target_temp.labels(printer=name).set(0)
-                    metrics.chamber_temp.labels(printer=name).set(0)
-                    metrics.print_progress.labels(printer=name).set(0)
-                    metrics.print_remaining_time.labels(printer=name).set(0)
-                    metrics.current_layer.labels(printer=name).set(0)
-                    metrics.total_layers.labels(printer=name).set(0)
-                    metrics.print_speed.labels(printer=name).set(0)
-                    metrics.error_code.labels(printer=name).set(0)
-                    metrics.printer_state.labels(printer=name).set(0)
-                    self.logger.debug(f"Cleared metrics for offline printer '{name}'")
-                    continue
-                
-                # Printer is online and sending data
-                metrics.printer_online.labels(printer=name).set(1)
-                
-                # Print progress metrics
-                try:
-                    progress = printer.get_percentage()
-                    if progress is not None:
-                        metrics.print_progress.labels(printer=name).set(progress)
-                except Exception as e:
-                    self.logger.debug(f"Error getting progress for '{name}': {e}")
-                
-                try:
-                    remaining_time = printer.get_time()
-                    if remaining_time is not None:
-                        # Convert minutes to seconds
-                        metrics.print_remaining_time.labels(printer=name).set(remaining_time * 60)
-                except Exception as e:
-                    self.logger.debug(f"Error getting remaining time for '{name}': {e}")
-                
-                try:
-                    current_layer = printer.current_layer_num()
-                    if current_layer is not None:
-                        metrics.current_layer.labels(printer=name).set(current_layer)
-                except Exception as e:
-                    self.logger.debug(f"Error getting current layer for '{name}': {e}")
-                
-                try:
-                    total_layers = printer.total_layer_num()
-                    if total_layers is not None:
-                        metrics.total_layers.labels(printer=name).set(total_layers)
-                except Exception as e:
-                    self.logger.debug(f"Error getting total layers for '{name}': {e}")
-                
-                # Speed metrics
-                try:
-                    print_speed = printer.get_print_speed()
-                    if print_speed is not None:
-                        metrics.print_speed.labels(printer=name).set(print_speed)
-                        self.logger.info(f"Printer '{name}' speed: {print_speed}%")
-                    else:
-                        self.logger.warning(f"Printer '{name}' speed is None")
-                except Exception as e:
-                    self.logger.warning(f"Error getting print speed for '{name}': {e}")
-                
-                # WiFi signal
-                try:
-                    wifi_signal = printer.wifi_signal()
-                    if wifi_signal is not None:
-                        # Convert from string like "-63dBm" to number
-                        signal_str = str(wifi_signal).replace('dBm', '').strip()
-                        metrics.wifi_signal.labels(printer=name).set(float(signal_str))
-                except Exception as e:
-                    self.logger.debug(f"Error getting WiFi signal for '{name}': {e}")
-                
-                # Chamber light
+                # Also check gcode_state attribute for more accurate state
+                gcode_state = None
                 try:
-                    light_state = printer.get_light_state()
-                    if light_state is not None:
-                        # API returns string 'on' or 'off', not boolean
-                        is_on = str(light_state).lower() == 'on'
-                        metrics.chamber_light.labels(printer=name).set(1 if is_on else 0)
-                except Exception as e:
-                    self.logger.debug(f"Error getting light state for '{name}': {e}")
+                    gcode_state = printer.gcode_state
+                except:
+                    pass
                 
-                # Detailed printer state
-                try:
-                    # Use get_state() instead of get_current_state() - get_current_state() returns stale data
-                    state = printer.get_state()
+                if state is not None:
+                    state_str = _as_str(state).upper()
                     
-                    # Also check gcode_state attribute for more accurate state
-                    gcode_state = None
-                    try:
-                        gcode_state = printer.gcode_state
-                    except:
-                        pass
+                    # Override with gcode_state if available
+                    if gcode_state:
+                        gcode_str = _as_str(gcode_state).upper()
+                        if gcode_str in _STATE_MAP:
+                            state_str = gcode_str
                     
-                    if state is not None:
-                        # Map state enum to numeric value
-                        state_mapping = {
-                            'IDLE': 0,
-                            'PRINTING': 1,
-                            'RUNNING': 1,  # RUNNING is the same as PRINTING
-                            'PAUSED': 2,
-                            'FINISH': 3,
-                            'FAILED': 4
-                        }
-                        state_str = str(state).upper()
-                        
-                        # Override with gcode_state if available
-                        if gcode_state:
-                            gcode_str = str(gcode_state).upper()
-                            if gcode_str in state_mapping:
-                                state_str = gcode_str
-                        
-                        state_value = state_mapping.get(state_str, 0)
-                        metrics.printer_state.labels(printer=name).set(state_value)
-                        self.logger.info(f"Printer '{name}' state: {state_str} -> {state_value} (gcode_state: {gcode_state})")
-                except Exception as e:
-                    self.logger.warning(f"Error getting printer state for '{name}': {e}")
-                
-                # Error code
-                try:
-                    error_code = printer.print_error_code()
-                    if error_code is not None:
-                        metrics.error_code.labels(printer=name).set(int(error_code) if error_code else 0)
-                except Exception as e:
-                    self.logger.debug(f"Error getting error code for '{name}': {e}")
-                
-                # Current file info
-                try:
-                    filename = printer.get_file_name()
-                    if filename:
-                        # Clear old values first
-                        metrics.current_file._metrics.clear()
-                        # Set new value with filename in label
-                        metrics.current_file.labels(printer=name, filename=str(filename)).set(1)
-                        self.logger.info(f"Printer '{name}' file: {filename}")
-                    else:
-                        self.logger.warning(f"Printer '{name}' filename is None/empty")
-                except Exception as e:
-                    self.logger.warning(f"Error getting file name for '{name}': {e}")
-                
-                # Nozzle info (static data)
-                try:
-                    nozzle_type = printer.nozzle_type()
-                    nozzle_diameter = printer.nozzle_diameter()
-                    if nozzle_type is not None and nozzle_diameter is not None:
-                        # Clear old values first
-                        metrics.nozzle_info._metrics.clear()
-                        metrics.nozzle_info.labels(
-                            printer=name,
-                            nozzle_type=str(nozzle_type),
-                            nozzle_diameter_mm=str(nozzle_diameter)
-                        ).set(1)
-                except Exception as e:
-                    self.logger.debug(f"Error getting nozzle info for '{name}': {e}")
-                
-                self.logger.debug(f"Updated metrics for printer '{name}'")
-                
+                    state_value = _STATE_MAP.get(state_str, 0)
+                    bm.printer_state.set(state_value)
+                    self.logger.info("Printer '%s' state: %s -> %s (gcode_state: %s)", name, state_str, state_value, gcode_state)
             except Exception as e:
-                self.logger.error(f"Error updating metrics for printer '{name}': {e}")
-                self.metrics[name].printer_online.labels(printer=name).set(0)
+                self.logger.warning("Error getting printer state for '%s': %s", name, e)
+            
+            # Current file info
+            try:
+                filename = printer.get_file_name()
+                if filename:
+                    self._set_info(metrics.current_file, self._last_file_labels, name, _as_str(filename))
+                    self.logger.info("Printer '%s' file: %s", name, filename)
+                else:
+                    self.logger.warning("Printer '%s' filename is None/empty", name)
+            except Exception as e:
+                self.logger.warning("Error getting file name for '%s': %s", name, e)
+            
+            # Nozzle info (static data)
+            try:
+                nozzle_type = printer.nozzle_type()
+                nozzle_diameter = printer.nozzle_diameter()
+                if nozzle_type is not None and nozzle_diameter is not None:
+                    self._set_info(
+                        metrics.nozzle_info,
+                        self._last_nozzle_labels,
+                        name,
+                        _as_str(nozzle_type),
+                        _as_str(nozzle_diameter)
+                    )
+            except Exception as e:
+                self.logger.debug("Error getting nozzle info for '%s': %s", name, e)
+            
+            self.logger.debug("Updated metrics for printer '%s'", name)
+            
+        except Exception as e:
+            self.logger.error("Error updating metrics for printer '%s': %s", name, e)
+            self.bound[name].printer_online.set(0)
     
     def run(self):
         """Run the exporter main loop."""
@@ -492,17 +680,21 @@ class BambuExporter:
         port = self.config.get('exporter', {}).get('port', 9100)
         bind_address = self.config.get('exporter', {}).get('bind_address', '0.0.0.0')
         
+        # Registered before any printer gauges so each scrape refreshes them before they're rendered
+        self.registry.register(BambuCollector(self))
+        
         self.logger.info(f"Starting Prometheus HTTP server on {bind_address}:{port}")
-        start_http_server(port, addr=bind_address)
+        start_http_server(port, addr=bind_address, registry=self.registry)
         
-        # Start Flask server in background thread for camera feed
-        flask_port = port + 1  # Use next port for Flask (9101 by default)
-        self.logger.info(f"Starting camera server on {bind_address}:{flask_port}")
-        flask_thread = Thread(
-            target=lambda: self.flask_app.run(host=bind_address, port=flask_port, debug=False, use_reloader=False),
+        # Start camera server in background thread
+        camera_port = port + 1  # Use next port for camera (9101 by default)
+        self.logger.info(f"Starting camera server on {bind_address}:{camera_port}")
+        camera_thread = Thread(
+            target=self._serve_camera,
+            args=(bind_address, camera_port),
             daemon=True
         )
-        flask_thread.start()
+        camera_thread.start()
         
         # Connect to printers
         self.connect_printers()
@@ -511,19 +703,26 @@ class BambuExporter:
             self.logger.error("No printers connected. Exiting.")
             return
         
-        # Main loop
-        update_interval = self.config.get('exporter', {}).get('update_interval', 5)
-        self.logger.info(f"Starting metric collection (interval: {update_interval}s)")
+        # Metrics are collected on scrape; the main loop is only a connection heartbeat
+        update_interval = self.update_interval
+        self.logger.info(
+            f"Collecting metrics on scrape (max age: {update_interval}s), "
+            f"checking connections every {update_interval}s"
+        )
         
         while self.running:
             try:
-                self.update_metrics()
-                time.sleep(update_interval)
+                self.check_connections()
             except Exception as e:
                 self.logger.error(f"Error in main loop: {e}")
-                time.sleep(update_interval)
+            
+            # Waiting on an event lets the signal handler end the wait immediately
+            if self._shutdown.wait(update_interval):
+                break
         
         # Cleanup
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
         self.disconnect_printers()
         self.logger.info("Exporter stopped")
     
@@ -531,6 +730,7 @@ class BambuExporter:
         """Handle shutdown signals."""
         self.logger.info(f"Received signal {signum}, shutting down...")
         self.running = False
+        self._shutdown.set()
 
 
 def main():
@@ -6,11 +6,12 @@ import pytest
 from unittest.mock import Mock, patch
 import sys
 import os
+from prometheus_client import CollectorRegistry, generate_latest
 
 # Add src directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
-from exporter import BambuExporter, BambuMetrics
+from exporter import BambuCollector, BambuExporter, BambuMetrics
 
 
 class TestBambuMetrics:
@@ -50,6 +51,116 @@ printers:
         assert len(exporter.config['printers']) == 1
         assert exporter.config['printers'][0]['name'] == "test_printer"
     
+    def test_config_cache_invalidated_on_change(self, tmp_path):
+        """Test that cached config is reused until the file changes."""
+        config_file = tmp_path / "test_config.yaml"
+        config_file.write_text("exporter:\n  port: 9100\n")
+        
+        exporter = BambuExporter(str(config_file))
+        exporter.config['exporter']['port'] = 1234
+        assert exporter._load_config(str(config_file))['exporter']['port'] == 9100
+        
+        config_file.write_text("exporter:\n  port: 19100\n")
+        os.utime(config_file, ns=(0, 0))
+        assert exporter._load_config(str(config_file))['exporter']['port'] == 19100
+    
+    def test_refresh_metrics_respects_interval(self, tmp_path):
+        """Test that scrapes within update_interval reuse the last update."""
+        config_file = tmp_path / "test_config.yaml"
+        config_file.write_text("exporter:\n  update_interval: 60\n")
+        
+        exporter = BambuExporter(str(config_file))
+        exporter.printers["test_printer"] = Mock()
+        exporter.update_metrics = Mock()
+        
+        exporter.refresh_metrics()
+        exporter.refresh_metrics()
+        
+        exporter.update_metrics.assert_called_once()
+    
+    @patch('exporter.bl.Printer')
+    def test_scrape_refreshes_metrics(self, mock_printer_class, tmp_path):
+        """Test that a scrape renders values refreshed during that scrape."""
+        config_file = tmp_path / "test_config.yaml"
+        config_file.write_text("""
+exporter:
+  update_interval: 60
+
+printers:
+  - name: "test_printer"
+    ip: "192.168.1.100"
+    access_code: "12345678"
+    serial: "TEST123"
+    enabled: true
+""")
+        
+        mock_printer = Mock()
+        mock_printer.mqtt_client_connected.return_value = True
+        mock_printer.get_nozzle_temperature.return_value = 215.0
+        mock_printer.get_bed_temperature.return_value = 60.0
+        mock_printer.get_percentage.return_value = 42
+        mock_printer_class.return_value = mock_printer
+        
+        registry = CollectorRegistry()
+        exporter = BambuExporter(str(config_file), registry=registry)
+        registry.register(BambuCollector(exporter))
+        exporter.connect_printers()
+        
+        # Nothing has polled the printer yet; the scrape itself must do it
+        mock_printer.get_nozzle_temperature.assert_not_called()
+        output = generate_latest(registry).decode()
+        
+        assert 'bambu_nozzle_temperature_celsius{printer="test_printer"} 215.0' in output
+        assert 'bambu_bed_temperature_celsius{printer="test_printer"} 60.0' in output
+        assert 'bambu_print_progress_percent{printer="test_printer"} 42.0' in output
+        assert 'bambu_online{printer="test_printer"} 1.0' in output
+    
+    @patch('exporter.bl.Printer')
+    def test_current_file_series_follows_filename(self, mock_printer_class, tmp_path):
+        """Test that a filename change replaces this printer's file info series."""
+        config_file = tmp_path / "test_config.yaml"
+        config_file.write_text("""
+printers:
+  - name: "test_printer"
+    ip: "192.168.1.100"
+    access_code: "12345678"
+    serial: "TEST123"
+    enabled: true
+""")
+        
+        mock_printer = Mock()
+        mock_printer.mqtt_client_connected.return_value = True
+        mock_printer.get_nozzle_temperature.return_value = 215.0
+        mock_printer.get_file_name.return_value = "a.gcode"
+        mock_printer_class.return_value = mock_printer
+        
+        registry = CollectorRegistry()
+        exporter = BambuExporter(str(config_file), registry=registry)
+        exporter.connect_printers()
+        
+        def file_info(filename):
+            return registry.get_sample_value(
+                'bambu_current_file_info',
+                {'printer': 'test_printer', 'filename': filename}
+            )
+        
+        exporter.update_metrics()
+        assert file_info("a.gcode") == 1
+        
+        mock_printer.get_file_name.return_value = "b.gcode"
+        exporter.update_metrics()
+        assert file_info("a.gcode") is None
+        assert file_info("b.gcode") == 1
+        
+        # An unchanged filename must leave the gauge alone
+        current_file = exporter.metrics["test_printer"].current_file
+        with patch.object(current_file, 'labels') as mock_labels, \
+                patch.object(current_file, 'remove') as mock_remove:
+            exporter.update_metrics()
+        mock_labels.assert_not_called()
+        mock_remove.assert_not_called()
+        assert file_info("b.gcode") == 1
+    
     @patch('exporter.bl.Printer')
     def test_connect_printers(self, mock_printer_class, tmp_path):
         """Test printer connection."""